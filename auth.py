@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+from cachetools import TTLCache
+import hashlib
+import time
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db, User
 import os
 from dotenv import load_dotenv
@@ -16,12 +20,21 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Prepared key object shared by every sign/verify call instead of being
+# rebuilt from SECRET_KEY on each token
+_signing_key = jwk.construct(SECRET_KEY, ALGORITHM) if SECRET_KEY else None
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Security scheme
 security = HTTPBearer()
 
+# Authenticated users keyed on a digest of their bearer token, so hot
+# endpoints skip the JWT decode and the user lookup on repeat requests.
+USER_CACHE_TTL_SECONDS = 30
+_user_cache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL_SECONDS)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -39,7 +52,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _signing_key, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
@@ -51,28 +64,44 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     )
     
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(credentials.credentials, _signing_key, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    return {"username": username}
+    return {"username": username, "exp": payload.get("exp")}
 
-def get_current_user(token_data: dict = Depends(verify_token), db: Session = Depends(get_db)):
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+):
     """Get current authenticated user."""
-    user = db.query(User).filter(User.username == token_data["username"]).first()
+    cache_key = hashlib.blake2b(credentials.credentials.encode(), digest_size=16).digest()
+    cached = _user_cache.get(cache_key)
+    if cached is not None:
+        user, expires_at = cached
+        if expires_at is None or expires_at > time.time():
+            return user
+    
+    token_data = verify_token(credentials)
+    user = await db.scalar(select(User).where(User.username == token_data["username"]))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    
+    # Detach the user so a later rollback of this session cannot expire the
+    # instance that other requests will be served from the cache
+    db.expunge(user)
+    _user_cache[cache_key] = (user, token_data["exp"])
     return user
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: AsyncSession, email: str, password: str):
     """Authenticate user with email and password."""
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         return False
     if not verify_password(password, user.hashed_password):
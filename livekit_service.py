@@ -1,10 +1,28 @@
 from livekit import api
+from livekit.api.access_token import DEFAULT_TTL
+from aiocache import Cache
+from aiocache.serializers import PickleSerializer
+from cachetools import TTLCache
+from google.protobuf.json_format import MessageToDict
+from datetime import timedelta
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 from typing import Optional
 
 load_dotenv()
 
+# Participant tokens keep livekit-api's default lifetime. Cached tokens are
+# handed out for at most TOKEN_CACHE_TTL so every token returned still has
+# a few minutes left.
+TOKEN_CACHE_TTL = DEFAULT_TTL - timedelta(minutes=5)
+
+# Room/participant listings are served from cache for this many seconds.
+# Shared through Redis when REDIS_URL is set, otherwise kept per process.
+ROOM_INFO_CACHE_TTL = 2
+REDIS_URL = os.getenv("REDIS_URL")
+
 class LiveKitService:
     def __init__(self):
         self.api_key = os.getenv("LIVEKIT_API_KEY")
@@ -13,6 +31,33 @@ class LiveKitService:
         
         if not all([self.api_key, self.api_secret, self.livekit_url]):
             raise ValueError("LiveKit configuration is incomplete. Please check your environment variables.")
+        
+        # HTTP(S) endpoint of the LiveKit server API
+        self._http_uri = self.livekit_url.replace('wss://', 'https://').replace('ws://', 'http://')
+        
+        # Shared LiveKit API client, reused across requests. It owns an
+        # aiohttp session, so it is created lazily inside the running loop.
+        self._api = None
+        
+        # Signed participant tokens keyed on everything that goes into the JWT
+        self._token_cache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL.total_seconds())
+        self._token_cache_lock = threading.Lock()
+        
+        # Recent get_room_info results keyed on room name. Entries are plain
+        # dicts since LiveKit's protobuf messages cannot be pickled.
+        if REDIS_URL:
+            self._room_info_cache = Cache.from_url(REDIS_URL)
+            self._room_info_cache.serializer = PickleSerializer()
+        else:
+            self._room_info_cache = Cache(Cache.MEMORY)
+        self._room_info_cache.namespace = "livekit:room_info:"
+    
+    @property
+    def _room_client(self):
+        """Room API of the shared LiveKit client, created on first use."""
+        if self._api is None:
+            self._api = api.LiveKitAPI(self._http_uri, self.api_key, self.api_secret)
+        return self._api.room
     
     def create_access_token(
         self, 
@@ -33,6 +78,12 @@ class LiveKitService:
         Returns:
             JWT token string
         """
+        cache_key = (room_name, participant_identity, participant_name, metadata)
+        with self._token_cache_lock:
+            cached_token = self._token_cache.get(cache_key)
+        if cached_token is not None:
+            return cached_token
+        
         token = api.AccessToken(self.api_key, self.api_secret)
         token.with_identity(participant_identity)
         
@@ -51,7 +102,10 @@ class LiveKitService:
             can_publish_data=True
         ))
         
-        return token.to_jwt()
+        jwt_token = token.to_jwt()
+        with self._token_cache_lock:
+            self._token_cache[cache_key] = jwt_token
+        return jwt_token
     
     def create_room_admin_token(self, participant_identity: str) -> str:
         """
@@ -83,27 +137,50 @@ class LiveKitService:
             room_name: Name of the room
         
         Returns:
-            Room information and participants
+            Room information and participants as plain dicts
         """
         try:
-            room_client = api.RoomService(
-                http_uri=self.livekit_url.replace('wss://', 'https://').replace('ws://', 'http://'),
-                api_key=self.api_key,
-                api_secret=self.api_secret
-            )
-            
-            room_info = await room_client.get_room(api.GetRoomRequest(name=room_name))
-            participants = await room_client.list_participants(
-                api.ListParticipantsRequest(room=room_name)
+            cached_info = await self._room_info_cache.get(room_name)
+        except Exception as e:
+            print(f"Error reading room info cache: {e}")
+            cached_info = None
+        if cached_info is not None:
+            return cached_info
+        
+        try:
+            rooms, participants = await asyncio.gather(
+                self._room_client.list_rooms(api.ListRoomsRequest(names=[room_name])),
+                self._room_client.list_participants(
+                    api.ListParticipantsRequest(room=room_name)
+                )
             )
-            
-            return {
-                "room": room_info,
-                "participants": participants.participants
-            }
         except Exception as e:
             print(f"Error getting room info: {e}")
             return None
+        
+        info = {
+            "room": MessageToDict(rooms.rooms[0], preserving_proto_field_name=True) if rooms.rooms else None,
+            "participants": [
+                {
+                    "identity": p.identity,
+                    "name": p.name,
+                    "metadata": p.metadata,
+                    "num_tracks": len(p.tracks),
+                    "permission": {
+                        "can_publish": p.permission.can_publish,
+                        "can_subscribe": p.permission.can_subscribe,
+                        "can_publish_data": p.permission.can_publish_data
+                    }
+                }
+                for p in participants.participants
+            ]
+        }
+        
+        try:
+            await self._room_info_cache.set(room_name, info, ttl=ROOM_INFO_CACHE_TTL)
+        except Exception as e:
+            print(f"Error writing room info cache: {e}")
+        return info
     
     async def create_room(self, room_name: str, max_participants: int = 50):
         """
@@ -117,13 +194,7 @@ class LiveKitService:
             Created room information
         """
         try:
-            room_client = api.RoomService(
-                http_uri=self.livekit_url.replace('wss://', 'https://').replace('ws://', 'http://'),
-                api_key=self.api_key,
-                api_secret=self.api_secret
-            )
-            
-            room = await room_client.create_room(api.CreateRoomRequest(
+            room = await self._room_client.create_room(api.CreateRoomRequest(
                 name=room_name,
                 max_participants=max_participants
             ))
@@ -144,17 +215,23 @@ class LiveKitService:
             Success status
         """
         try:
-            room_client = api.RoomService(
-                http_uri=self.livekit_url.replace('wss://', 'https://').replace('ws://', 'http://'),
-                api_key=self.api_key,
-                api_secret=self.api_secret
-            )
-            
-            await room_client.delete_room(api.DeleteRoomRequest(room=room_name))
-            return True
+            await self._room_client.delete_room(api.DeleteRoomRequest(room=room_name))
         except Exception as e:
             print(f"Error deleting room: {e}")
             return False
+        
+        try:
+            await self._room_info_cache.delete(room_name)
+        except Exception as e:
+            print(f"Error evicting room info cache: {e}")
+        return True
+    
+    async def aclose(self):
+        """Close the shared LiveKit client's HTTP session and the room info cache."""
+        if self._api is not None:
+            await self._api.aclose()
+            self._api = None
+        await self._room_info_cache.close()
 
 # Global instance
 livekit_service = LiveKitService()
@@ -1,17 +1,21 @@
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, and_, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+import argparse
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
 
 # Import our modules
-from database import get_db, create_tables, User, Room, RoomMembership
+from database import get_db, create_tables, engine, User, Room, RoomMembership
 from schemas import (
     UserCreate, UserLogin, UserResponse, Token,
-    RoomCreate, RoomResponse, RoomWithParticipants,
+    RoomCreate, RoomResponse, RoomWithParticipants, RoomParticipant,
     TokenRequest, TokenResponse
 )
 from auth import (
@@ -30,21 +34,27 @@ app = FastAPI(
 )
 
 # CORS middleware
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "*").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure this for production
+    allow_origins=ALLOWED_ORIGINS,  # Set ALLOWED_ORIGINS for production
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["authorization", "content-type"],
 )
 
 # Security
 security = HTTPBearer()
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database tables on startup."""
-    create_tables()
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release LiveKit service resources on shutdown."""
+    await livekit_service.aclose()
 
 # Health check endpoint
 @app.get("/health")
@@ -55,12 +65,14 @@ async def health_check():
 # === USER MANAGEMENT ENDPOINTS ===
 
 @app.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.email == user.email) | (User.username == user.username)
-    ).first()
+    existing_user = await db.scalar(
+        select(literal(1))
+        .where((User.email == user.email) | (User.username == user.username))
+        .limit(1)
+    )
     
     if existing_user:
         raise HTTPException(
@@ -77,21 +89,14 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     
-    return UserResponse(
-        id=db_user.id,
-        username=db_user.username,
-        email=db_user.email,
-        is_active=db_user.is_active,
-        created_at=db_user.created_at
-    )
+    return UserResponse.model_validate(db_user)
 
 @app.post("/auth/login", response_model=Token)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Authenticate user and return access token."""
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.email, user_credentials.password)
     
     if not user:
         raise HTTPException(
@@ -107,25 +112,21 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
 @app.get("/auth/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information."""
-    return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        is_active=current_user.is_active,
-        created_at=current_user.created_at
-    )
+    return UserResponse.model_validate(current_user)
 
 # === ROOM MANAGEMENT ENDPOINTS ===
 
 @app.post("/rooms", response_model=RoomResponse, status_code=status.HTTP_201_CREATED)
 async def create_room(
     room: RoomCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new room."""
     # Check if room with this name already exists
-    existing_room = db.query(Room).filter(Room.name == room.name).first()
+    existing_room = await db.scalar(
+        select(literal(1)).where(Room.name == room.name).limit(1)
+    )
     if existing_room:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -142,62 +143,66 @@ async def create_room(
     )
     
     db.add(db_room)
-    db.commit()
-    db.refresh(db_room)
-    
-    # Create room on LiveKit server
-    await livekit_service.create_room(room.name, room.max_participants)
     
-    return RoomResponse(
-        id=db_room.id,
-        name=db_room.name,
-        display_name=db_room.display_name,
-        description=db_room.description,
-        creator_id=db_room.creator_id,
-        is_active=db_room.is_active,
-        max_participants=db_room.max_participants,
-        created_at=db_room.created_at,
-        participant_count=0
+    # Commit to the database and create the room on LiveKit server concurrently
+    commit_result, _ = await asyncio.gather(
+        db.commit(),
+        livekit_service.create_room(room.name, room.max_participants),
+        return_exceptions=True
     )
+    
+    if isinstance(commit_result, IntegrityError):
+        # Another request committed a room with this name first; the LiveKit
+        # room belongs to it, so leave it in place
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Room with this name already exists"
+        )
+    if isinstance(commit_result, Exception):
+        # Don't leave an orphaned LiveKit room behind a failed insert
+        await livekit_service.delete_room(room.name)
+        raise commit_result
+    
+    return RoomResponse.model_validate(db_room)
 
 @app.get("/rooms", response_model=List[RoomResponse])
 async def list_rooms(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """List all active rooms."""
-    rooms = db.query(Room).filter(Room.is_active == True).all()
-    
-    room_responses = []
-    for room in rooms:
-        # Count active participants
-        participant_count = db.query(RoomMembership).filter(
-            RoomMembership.room_id == room.id,
+    # Fetch only the response columns and count active participants for
+    # every room in a single grouped query
+    rows = (await db.execute(
+        select(
+            Room.id,
+            Room.name,
+            Room.display_name,
+            Room.description,
+            Room.creator_id,
+            Room.is_active,
+            Room.max_participants,
+            Room.created_at,
+            func.count(RoomMembership.id).label("participant_count")
+        )
+        .outerjoin(RoomMembership, and_(
+            RoomMembership.room_id == Room.id,
             RoomMembership.is_active == True
-        ).count()
-        
-        room_responses.append(RoomResponse(
-            id=room.id,
-            name=room.name,
-            display_name=room.display_name,
-            description=room.description,
-            creator_id=room.creator_id,
-            is_active=room.is_active,
-            max_participants=room.max_participants,
-            created_at=room.created_at,
-            participant_count=participant_count
         ))
+        .where(Room.is_active == True)
+        .group_by(Room.id)
+    )).all()
     
-    return room_responses
+    return [RoomResponse.model_construct(**row._mapping) for row in rows]
 
 @app.get("/rooms/{room_id}", response_model=RoomWithParticipants)
 async def get_room_details(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get room details including participants."""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -209,40 +214,21 @@ async def get_room_details(
     participants = []
     
     if room_info and room_info.get("participants"):
-        for p in room_info["participants"]:
-            participants.append({
-                "identity": p.identity,
-                "name": p.name,
-                "metadata": p.metadata,
-                "num_tracks": len(p.tracks),
-                "permission": {
-                    "can_publish": p.permission.can_publish,
-                    "can_subscribe": p.permission.can_subscribe,
-                    "can_publish_data": p.permission.can_publish_data
-                }
-            })
+        participants = [RoomParticipant(**p) for p in room_info["participants"]]
     
-    return RoomWithParticipants(
-        id=room.id,
-        name=room.name,
-        display_name=room.display_name,
-        description=room.description,
-        creator_id=room.creator_id,
-        is_active=room.is_active,
-        max_participants=room.max_participants,
-        created_at=room.created_at,
-        participant_count=len(participants),
-        participants=participants
-    )
+    return RoomWithParticipants.model_validate(room).model_copy(update={
+        "participant_count": len(participants),
+        "participants": participants
+    })
 
 @app.post("/rooms/{room_id}/join", response_model=TokenResponse)
 async def join_room(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Join a room and get LiveKit access token."""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -250,11 +236,15 @@ async def join_room(
         )
     
     # Check if user is already in the room
-    existing_membership = db.query(RoomMembership).filter(
-        RoomMembership.user_id == current_user.id,
-        RoomMembership.room_id == room_id,
-        RoomMembership.is_active == True
-    ).first()
+    existing_membership = await db.scalar(
+        select(literal(1))
+        .where(
+            RoomMembership.user_id == current_user.id,
+            RoomMembership.room_id == room_id,
+            RoomMembership.is_active == True
+        )
+        .limit(1)
+    )
     
     if not existing_membership:
         # Add user to room membership
@@ -263,7 +253,7 @@ async def join_room(
             room_id=room_id
         )
         db.add(membership)
-        db.commit()
+        await db.commit()
     
     # Generate LiveKit access token
     token = livekit_service.create_access_token(
@@ -283,31 +273,31 @@ async def join_room(
 @app.post("/rooms/{room_id}/leave")
 async def leave_room(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Leave a room."""
-    membership = db.query(RoomMembership).filter(
+    membership = await db.scalar(select(RoomMembership).where(
         RoomMembership.user_id == current_user.id,
         RoomMembership.room_id == room_id,
         RoomMembership.is_active == True
-    ).first()
+    ))
     
     if membership:
         membership.is_active = False
-        membership.left_at = db.execute("SELECT NOW()").scalar()
-        db.commit()
+        membership.left_at = func.now()
+        await db.commit()
     
     return {"message": "Left room successfully"}
 
 @app.delete("/rooms/{room_id}")
 async def delete_room(
     room_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a room (only room creator can delete)."""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    room = await db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -323,19 +313,45 @@ async def delete_room(
     # Mark room as inactive
     room.is_active = False
     
-    # Mark all memberships as inactive
-    memberships = db.query(RoomMembership).filter(RoomMembership.room_id == room_id).all()
-    for membership in memberships:
-        membership.is_active = False
+    # Mark all memberships as inactive in a single UPDATE
+    await db.execute(
+        update(RoomMembership)
+        .where(RoomMembership.room_id == room_id)
+        .values(is_active=False)
+    )
     
-    db.commit()
+    # Commit and delete the room from LiveKit server concurrently
+    commit_result, _ = await asyncio.gather(
+        db.commit(),
+        livekit_service.delete_room(room.name),
+        return_exceptions=True
+    )
     
-    # Delete room from LiveKit server
-    await livekit_service.delete_room(room.name)
+    if isinstance(commit_result, Exception):
+        # The room is still active in the database, so restore it on LiveKit
+        print(f"Error deleting room {room.name}, recreating it on LiveKit: {commit_result}")
+        await livekit_service.create_room(room.name, room.max_participants)
+        raise commit_result
     
     return {"message": "Room deleted successfully"}
 
+async def init_dev_database():
+    """Create tables directly for local development (use Alembic elsewhere)."""
+    await create_tables()
+    await engine.dispose()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the LiveKit video calling backend")
+    parser.add_argument(
+        "--create-tables",
+        action="store_true",
+        help="create database tables before starting (local development only)"
+    )
+    args = parser.parse_args()
+    
+    if args.create_tables:
+        asyncio.run(init_dev_database())
+    
     uvicorn.run(
         "main:app",
         host=os.getenv("HOST", "0.0.0.0"),
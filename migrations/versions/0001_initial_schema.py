@@ -0,0 +1,59 @@
+"""Initial schema
+
+Matches the tables previously created by create_all at startup.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    op.create_table(
+        "rooms",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("display_name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("creator_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("max_participants", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_rooms_id", "rooms", ["id"])
+    op.create_index("ix_rooms_name", "rooms", ["name"], unique=True)
+    
+    op.create_table(
+        "room_memberships",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("room_id", sa.Integer(), sa.ForeignKey("rooms.id"), nullable=False),
+        sa.Column("joined_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("left_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_room_memberships_id", "room_memberships", ["id"])
+
+def downgrade():
+    op.drop_table("room_memberships")
+    op.drop_table("rooms")
+    op.drop_table("users")
@@ -0,0 +1,22 @@
+"""Add lookup indexes for memberships and active rooms
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_rooms_active", "rooms", ["is_active"])
+    op.create_index("ix_rm_user_room_active", "room_memberships", ["user_id", "room_id", "is_active"])
+    op.create_index("ix_rm_room_active", "room_memberships", ["room_id", "is_active"])
+
+def downgrade():
+    op.drop_index("ix_rm_room_active", table_name="room_memberships")
+    op.drop_index("ix_rm_user_room_active", table_name="room_memberships")
+    op.drop_index("ix_rooms_active", table_name="rooms")
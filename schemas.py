@@ -28,6 +28,9 @@ class UserResponse(BaseModel):
     email: str
     is_active: bool
     created_at: datetime
+    
+    class Config:
+        from_attributes = True
 
 # Room Schemas
 class RoomBase(BaseModel):
@@ -58,6 +61,9 @@ class RoomResponse(BaseModel):
     max_participants: int
     created_at: datetime
     participant_count: Optional[int] = 0
+    
+    class Config:
+        from_attributes = True
 
 class RoomParticipant(BaseModel):
     identity: str
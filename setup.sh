@@ -32,6 +32,7 @@ echo ""
 echo "Next steps:"
 echo "1. Update the .env file with your database and LiveKit configuration"
 echo "2. Set up your PostgreSQL database"
-echo "3. Run the server with: python main.py"
+echo "3. Create the database schema with: alembic upgrade head"
+echo "4. Run the server with: python main.py"
 echo ""
 echo "API Documentation will be available at: http://localhost:8000/docs"